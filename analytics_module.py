@@ -0,0 +1,93 @@
+# analytics_module.py
+import random
+import threading
+import time
+from collections import deque
+
+
+class CountMinSketch:
+    """Approximate counter in fixed memory; estimates never undercount."""
+
+    def __init__(self, width=1024, depth=4):
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+        self.seeds = [random.getrandbits(32) for _ in range(depth)]
+
+    def _cells(self, key):
+        for row, seed in zip(self.rows, self.seeds):
+            yield row, hash((seed, key)) % self.width
+
+    def add(self, key, count=1):
+        for row, i in self._cells(key):
+            row[i] += count
+
+    def estimate(self, key):
+        return min(row[i] for row, i in self._cells(key))
+
+
+class HeavyHitters:
+    """Space-Saving top-k: tracks at most `capacity` keys, evicting the smallest."""
+
+    def __init__(self, capacity=40):
+        self.capacity = capacity
+        self.counts = {}
+
+    def add(self, key, count=1):
+        if key in self.counts or len(self.counts) < self.capacity:
+            self.counts[key] = self.counts.get(key, 0) + count
+            return
+        smallest = min(self.counts, key=self.counts.get)
+        self.counts[key] = self.counts.pop(smallest) + count
+
+
+class QueryAnalytics:
+    """
+    Popularity of origin/destination pairs over a sliding time window. The
+    window is split into buckets, each with its own sketch and heavy-hitter
+    list, so old traffic simply falls off when its bucket expires.
+    """
+
+    def __init__(self, window_seconds=3600, buckets=12, k=10, width=1024, depth=4):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = window_seconds / buckets
+        self.k = k
+        self.width = width
+        self.depth = depth
+        self.buckets = deque()  # (start time, CountMinSketch, HeavyHitters)
+        self.lock = threading.Lock()
+
+    def _expire(self, now):
+        while self.buckets and self.buckets[0][0] <= now - self.window_seconds:
+            self.buckets.popleft()
+
+    def record(self, origin, destination, now=None):
+        now = time.time() if now is None else now
+        key = (origin, destination)
+        with self.lock:
+            self._expire(now)
+            if not self.buckets or self.buckets[-1][0] + self.bucket_seconds <= now:
+                self.buckets.append((now, CountMinSketch(self.width, self.depth),
+                                     HeavyHitters(self.k * 4)))
+            _, sketch, hitters = self.buckets[-1]
+            sketch.add(key)
+            hitters.add(key)
+
+    def estimate(self, origin, destination, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            self._expire(now)
+            return sum(sketch.estimate((origin, destination)) for _, sketch, _ in self.buckets)
+
+    def top(self, k=None, now=None):
+        """The k most requested (origin, destination) pairs as [(pair, count)]."""
+        now = time.time() if now is None else now
+        with self.lock:
+            self._expire(now)
+            candidates = set()
+            for _, _, hitters in self.buckets:
+                candidates.update(hitters.counts)
+            ranked = [(pair, sum(sketch.estimate(pair) for _, sketch, _ in self.buckets))
+                      for pair in candidates]
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked[:k or self.k]
@@ -1,7 +1,19 @@
-from flask import Flask, render_template, request, jsonify
-from queue import Queue
+from flask import Flask, render_template, request, jsonify, Response
+from collections import OrderedDict, deque
+from partition_module import PartitionedGraph, PartitionRetired
+from changelog_module import GraphChangeLog
+from analytics_module import QueryAnalytics
+from routing_module import constrained_route, hop_distances, check_deadline, SearchTimeout
+from pareto_module import ATTRIBUTES, EdgeAttributes, pareto_routes
+from spatial_module import SpatialIndex, blend_recommendations
 import heapq
 import json, os
+import atexit, threading, time
+
+try:
+    import orjson  # much faster encoder for the large graph payloads
+except ImportError:
+    orjson = None
 
 app = Flask(__name__)
 
@@ -69,6 +81,17 @@ def load_graph_from_file():
             return json.load(f)
     return None
 
+def save_locations_to_file():
+    os.makedirs("history", exist_ok=True)
+    with open("history/locations.json", "w") as f:
+        json.dump(locations.snapshot(), f, indent=4)
+
+def load_locations_from_file():
+    if os.path.exists("history/locations.json"):
+        with open("history/locations.json", "r") as f:
+            return json.load(f)
+    return None
+
 
 # -----------------------------
 # Graph Initialization
@@ -85,6 +108,26 @@ default_graph = {
 }
 
 graph = load_graph_from_file() or make_undirected(default_graph)
+# held while editing `graph` (together with recording the change) and while
+# snapshotting it, so a version number always matches the graph it labels
+graph_lock = threading.RLock()
+
+# Optional (lat, lon) per city for /nearby, geo recommendations and A*
+default_locations = {
+    "Mumbai": (19.0760, 72.8777),
+    "Delhi": (28.6139, 77.2090),
+    "Tokyo": (35.6762, 139.6503),
+    "Bangkok": (13.7563, 100.5018),
+    "Osaka": (34.6937, 135.5023),
+    "Singapore": (1.3521, 103.8198),
+    "Kyoto": (35.0116, 135.7681),
+    "Hyderabad": (17.3850, 78.4867)
+}
+
+locations = SpatialIndex()
+for city, (lat, lon) in (load_locations_from_file() or default_locations).items():
+    locations.set_location(city, lat, lon)
+locations.rebuild()
 
 costs = {
     ("Mumbai", "Delhi"): 3,
@@ -97,11 +140,33 @@ costs = {
 for (a, b), c in list(costs.items()):
     costs[(b, a)] = c
 
-recent_searches = []  # Stack
-visited_queue = Queue()  # Queue
+recent_searches = deque(maxlen=5)  # Stack
+visited_queue = deque(maxlen=100)  # Queue (bounded, oldest visits fall off)
 route_history = RouteHistory()  # Linked List
 trip_plan = []
 
+# Partitioned mode: TRAVERSE_PARTITIONS=<n> splits the network into n regions,
+# each searched by its own worker process (see partition_module.py)
+PARTITIONS = int(os.environ.get("TRAVERSE_PARTITIONS", "0"))
+partitioned_graph = None  # (graph version it was built from, PartitionedGraph)
+partitions_shut_down = False
+partition_lock = threading.Lock()
+
+# Longest a single search may run, in seconds (async_server.py also lets a
+# request ask for less)
+COMPUTE_BUDGET = float(os.environ.get("TRAVERSE_COMPUTE_BUDGET", "2.0"))
+
+change_log = GraphChangeLog()  # versioned mutation log behind ETags and /graph/changes
+
+# Popular origin/destination pairs, and the route results warmed for them
+analytics = QueryAnalytics(window_seconds=3600, k=10)
+ROUTE_CACHE_SIZE = 1024
+route_cache = OrderedDict()  # (kind, start, goal) -> (graph version, result)
+route_cache_lock = threading.Lock()
+warm_event = threading.Event()
+
+attribute_store = None  # (graph version, EdgeAttributes) for Pareto routing
+
 
 # -----------------------------
 # ✅ Helper Functions (Fixed)
@@ -124,10 +189,11 @@ def dfs_all_paths(start, goal, path=None):
     return paths
 
 
-def bfs_shortest_path(start, goal):
+def bfs_shortest_path(start, goal, deadline=None):
     visited = set()
     queue = [[start]]
     while queue:
+        check_deadline(deadline)
         path = queue.pop(0)
         node = path[-1]
         if node == goal:
@@ -141,11 +207,13 @@ def bfs_shortest_path(start, goal):
     return None
 
 
-def best_route_by_cost(start, goal):
-    heap = [(0, start, [start])]
+def best_route_by_cost(start, goal, deadline=None):
+    estimate = astar_heuristic(goal)
+    heap = [(estimate(start), 0, start, [start])]
     visited = set()
     while heap:
-        cost, node, path = heapq.heappop(heap)
+        check_deadline(deadline)
+        _, cost, node, path = heapq.heappop(heap)
         if node == goal:
             return cost, path
         if node in visited:
@@ -157,10 +225,299 @@ def best_route_by_cost(start, goal):
                 next_city, edge_cost = neighbor_info[0], neighbor_info[1]
             else:
                 next_city, edge_cost = neighbor_info, costs.get((node, neighbor_info), 10)
-            heapq.heappush(heap, (cost + edge_cost, next_city, path + [next_city]))
+            new_cost = cost + edge_cost
+            heapq.heappush(heap, (new_cost + estimate(next_city), new_cost, next_city, path + [next_city]))
     return None, []
 
 
+heuristic_cache = None  # ((graph version, locations version), cost per km)
+
+def astar_heuristic(goal):
+    # Lower bound on the cost left to reach goal: straight-line km times the
+    # cheapest cost-per-km of any route. Only sound when every city is on the
+    # map, otherwise Dijkstra's zero estimate is used.
+    global heuristic_cache
+    with graph_lock:
+        key = (change_log.version, locations.version)
+        if heuristic_cache is None or heuristic_cache[0] != key:
+            edges = list(edge_list())
+            scale = None
+            if all(c in locations for c in graph) and all(e[1] in locations for e in edges):
+                ratios = []
+                for city, neighbor, cost in edges:
+                    km = locations.distance_km(city, neighbor)
+                    if km > 0:
+                        ratios.append(cost / km)
+                scale = min(ratios, default=None)
+                if scale is not None and scale <= 0:
+                    scale = None
+            heuristic_cache = (key, scale)
+        scale = heuristic_cache[1]
+    if scale is None or goal not in locations:
+        return lambda city: 0
+    return lambda city: scale * locations.distance_km(city, goal)
+
+
+def edge_list():
+    for city, neighbors in graph.items():
+        for neighbor_info in neighbors:
+            if isinstance(neighbor_info, (list, tuple)):
+                yield city, neighbor_info[0], neighbor_info[1]
+            else:
+                yield city, neighbor_info, costs.get((city, neighbor_info), 10)
+
+
+def edge_attributes():
+    # routes may carry (city, fare, duration, transfers); missing duration
+    # falls back to the fare, and `transfers` counts changes within the leg
+    # itself (none by default) -- changing between legs is added by the search
+    for city, neighbors in graph.items():
+        for neighbor_info in neighbors:
+            if isinstance(neighbor_info, (list, tuple)):
+                neighbor, fare = neighbor_info[0], neighbor_info[1]
+                duration = neighbor_info[2] if len(neighbor_info) > 2 else fare
+                transfers = neighbor_info[3] if len(neighbor_info) > 3 else 0
+            else:
+                neighbor, fare = neighbor_info, costs.get((city, neighbor_info), 10)
+                duration, transfers = fare, 0
+            yield city, neighbor, {"fare": fare, "duration": duration, "transfers": transfers}
+
+
+def get_attribute_store():
+    global attribute_store
+    with graph_lock:
+        version = change_log.version
+        if attribute_store is None or attribute_store[0] != version:
+            attribute_store = (version, EdgeAttributes(edge_attributes()))
+        return attribute_store[1]
+
+
+def weighted_adjacency():
+    with graph_lock:
+        adjacency = {city: [] for city in graph}
+        for city, neighbor, cost in edge_list():
+            adjacency[city].append((neighbor, cost))
+    return adjacency
+
+
+def partitioned_route(start, goal, unit=False, deadline=None):
+    # borrow the current workers, which may be a version behind while their
+    # replacement is built; returns (graph version they hold, (cost, path)).
+    # Raises PartitionRetired if none are ready yet.
+    with partition_lock:
+        if partitioned_graph is None:
+            raise PartitionRetired("partitioned graph is not built yet")
+        version, current = partitioned_graph
+        current.acquire()
+    try:
+        return version, current.route(start, goal, unit, deadline)
+    finally:
+        current.release()
+
+
+def rebuild_partitions():
+    # runs on the warm thread, never on the request path; queries keep using
+    # the old workers until the new ones are ready, and the old ones shut
+    # down once every query still using them has finished
+    global partitioned_graph
+    with graph_lock:
+        version = change_log.version
+        cities, edges = list(graph), list(edge_list())
+    with partition_lock:
+        if partitions_shut_down or (partitioned_graph and partitioned_graph[0] == version):
+            return
+    fresh = PartitionedGraph(cities, edges, PARTITIONS)
+    with partition_lock:
+        if partitions_shut_down:
+            retired = (version, fresh)
+        else:
+            retired, partitioned_graph = partitioned_graph, (version, fresh)
+    if retired is not None:
+        retired[1].retire()
+
+
+def reset_partitions():
+    # shutdown: stop the region workers for good
+    global partitioned_graph, partitions_shut_down
+    with partition_lock:
+        partitions_shut_down = True
+        retired, partitioned_graph = partitioned_graph, None
+    if retired is not None:
+        retired[1].retire()
+
+atexit.register(reset_partitions)
+
+
+def graph_changed(op, **details):
+    # op="reset" means the whole graph was replaced
+    if op == "reset":
+        change_log.reset()
+        entry = None
+    else:
+        entry = change_log.record(op, **details)
+    # region workers hold a snapshot of the old network; the warm thread
+    # builds their replacement
+    with route_cache_lock:
+        route_cache.clear()
+    warm_event.set()
+    return entry
+
+
+def encode_json(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def versioned_response(payload):
+    # tagged with the graph version; a client that already has it gets a 304
+    etag = change_log.etag()
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(encode_json(payload), mimetype="application/json")
+    response.set_etag(etag)
+    return response
+
+
+def find_best_route(start, goal, deadline=None):
+    # returns (graph version of the answer, or None for the live graph, (cost, path))
+    if PARTITIONS > 1:
+        try:
+            return partitioned_route(start, goal, deadline=deadline)
+        except PartitionRetired:
+            pass  # workers not built yet, or shut down mid-query
+    return None, best_route_by_cost(start, goal, deadline)
+
+
+def find_shortest_path(start, goal, deadline=None):
+    # returns (graph version of the answer, or None for the live graph, path)
+    if PARTITIONS > 1:
+        try:
+            version, (_, path) = partitioned_route(start, goal, unit=True, deadline=deadline)
+            return version, path or None
+        except PartitionRetired:
+            pass
+    return None, bfs_shortest_path(start, goal, deadline)
+
+
+def cached_route(kind, start, goal, deadline=None):
+    # kind is "best" (cost, path) or "shortest" (path); results are only
+    # reused while the graph version they were computed on is current.
+    # A search that passes its deadline raises SearchTimeout and is not cached.
+    version = change_log.version
+    key = (kind, start, goal)
+    with route_cache_lock:
+        hit = route_cache.get(key)
+        if hit and hit[0] == version:
+            route_cache.move_to_end(key)
+            return hit[1]
+    if kind == "best":
+        answered, result = find_best_route(start, goal, deadline)
+    else:
+        answered, result = find_shortest_path(start, goal, deadline)
+    if answered not in (None, version):
+        return result  # region workers still on an older graph; don't keep it
+    with route_cache_lock:
+        route_cache[key] = (version, result)
+        route_cache.move_to_end(key)
+        while len(route_cache) > ROUTE_CACHE_SIZE:
+            route_cache.popitem(last=False)
+    return result
+
+
+def record_query(start, goal):
+    # only pairs of real cities count towards /popular and cache warming
+    if start in graph and goal in graph:
+        analytics.record(start, goal)
+
+
+def warm_popular_routes():
+    # background job: after every graph change, rebuild the region workers
+    # (partitioned mode) and precompute the top pairs
+    while True:
+        warm_event.wait()
+        warm_event.clear()
+        if PARTITIONS > 1:
+            try:
+                rebuild_partitions()
+            except Exception:
+                app.logger.exception("Rebuilding the partitioned graph failed")
+        version = change_log.version
+        for (start, goal), _ in analytics.top():
+            if change_log.version != version:
+                break  # another edit landed; the next wake-up starts over
+            try:
+                cached_route("best", start, goal)
+                cached_route("shortest", start, goal)
+            except Exception:
+                # one bad pair must not stop warming for the rest of the process
+                app.logger.exception("Warming %s -> %s failed", start, goal)
+
+warm_event.set()  # first pass starts the region workers
+threading.Thread(target=warm_popular_routes, daemon=True).start()
+
+
+# Each search endpoint is split into parse / search / respond so the async
+# server (async_server.py) can coalesce the search step across requests
+
+def shortest_path_query(data):
+    return data.get("start", "").title(), data.get("goal", "").title()
+
+
+def run_shortest_path(query, deadline=None):
+    start, goal = query
+    return cached_route("shortest", start, goal, deadline)
+
+
+def shortest_path_payload(query, path):
+    start, goal = query
+    visited_queue.append(start)
+    record_query(start, goal)
+    if path:
+        route_history.add_route(start, goal, path)
+        return {"path": path}
+    return {"error": "No route found"}
+
+
+def best_route_query(data):
+    # raises ValueError for malformed avoid lists or limits
+    start, goal = data.get("start", "").title(), data.get("goal", "").title()
+    avoid = data.get("avoid") or []
+    if isinstance(avoid, str):
+        avoid = avoid.split(",")
+    if not isinstance(avoid, list) or not all(isinstance(c, str) for c in avoid):
+        raise ValueError("avoid must be a list of city names!")
+    avoid = tuple(sorted({c.strip().title() for c in avoid if c.strip()}))
+    try:
+        max_hops = int(data["max_hops"]) if data.get("max_hops") not in (None, "") else None
+        max_cost = float(data["max_cost"]) if data.get("max_cost") not in (None, "") else None
+    except (TypeError, ValueError):
+        raise ValueError("max_hops and max_cost must be numbers!")
+    return start, goal, avoid, max_hops, max_cost
+
+
+def run_best_route(query, deadline=None):
+    start, goal, avoid, max_hops, max_cost = query
+    if avoid or max_hops is not None or max_cost is not None:
+        # constraints prune the search itself instead of filtering every path
+        return constrained_route(weighted_adjacency(), start, goal, avoid, max_hops, max_cost,
+                                 deadline)
+    return cached_route("best", start, goal, deadline)
+
+
+def best_route_payload(query, result):
+    start, goal, avoid, max_hops, max_cost = query
+    cost, path = result
+    record_query(start, goal)
+    if path:
+        route_history.add_route(start, goal, path, cost)
+        return {"path": path, "cost": cost}
+    if avoid or max_hops is not None or max_cost is not None:
+        return {"error": "No route satisfies the given constraints"}
+    return {"error": "No best route found"}
+
+
 def has_cycle_util(city, visited, parent):
     visited.add(city)
     for neighbor_info in graph.get(city, []):
@@ -187,8 +544,7 @@ def explore_paths():
     data = request.get_json()
     start, goal = data.get("start", "").title(), data.get("goal", "").title()
     recent_searches.append((start, goal))
-    if len(recent_searches) > 5:
-        recent_searches.pop(0)
+    record_query(start, goal)
     paths = dfs_all_paths(start, goal)
     if paths:
         route_history.add_route(start, goal, paths[0])
@@ -198,14 +554,8 @@ def explore_paths():
 
 @app.route("/shortest_path", methods=["POST"])
 def shortest_path():
-    data = request.get_json()
-    start, goal = data.get("start", "").title(), data.get("goal", "").title()
-    visited_queue.put(start)
-    path = bfs_shortest_path(start, goal)
-    if path:
-        route_history.add_route(start, goal, path)
-        return jsonify({"path": path})
-    return jsonify({"error": "No route found"})
+    query = shortest_path_query(request.get_json())
+    return jsonify(shortest_path_payload(query, run_shortest_path(query)))
 
 
 @app.route("/add_city", methods=["POST"])
@@ -214,11 +564,23 @@ def add_city():
     city = data.get("city", "").title()
     if not city:
         return jsonify({"error": "City name required!"})
-    if city in graph:
-        return jsonify({"error": f"{city} already exists in the network!"})
-    graph[city] = []
-    save_graph_to_file()
-    return jsonify({"message": f"🏙️ City '{city}' added successfully!", "graph": graph})
+    lat, lon = data.get("lat"), data.get("lon")
+    if (lat in (None, "")) != (lon in (None, "")):
+        return jsonify({"error": "Enter both lat and lon, or neither!"})
+    with graph_lock:
+        if city in graph:
+            return jsonify({"error": f"{city} already exists in the network!"})
+        if lat not in (None, ""):
+            try:
+                locations.set_location(city, float(lat), float(lon))
+            except (TypeError, ValueError) as e:
+                return jsonify({"error": str(e) if isinstance(e, ValueError) else "lat and lon must be numbers!"})
+            save_locations_to_file()
+        graph[city] = []
+        change = graph_changed("add_city", city=city)
+        save_graph_to_file()
+    return jsonify({"message": f"🏙️ City '{city}' added successfully!",
+                    "version": change["version"], "changes": [change]})
 
 
 @app.route("/add_route", methods=["POST"])
@@ -226,18 +588,34 @@ def add_route():
     data = request.get_json()
     city1 = data.get("city1")
     city2 = data.get("city2")
-    cost = int(data.get("cost", 1))
     if not city1 or not city2:
         return jsonify({"error": "Both cities are required!"})
-    if city1 not in graph:
-        graph[city1] = []
-    if city2 not in graph:
-        graph[city2] = []
-    # ✅ store tuples properly
-    graph[city1].append((city2, cost))
-    graph[city2].append((city1, cost))
-    save_graph_to_file()
-    return jsonify({"message": f"✅ Route added between {city1} and {city2} (Cost: {cost})"})
+    try:
+        cost = int(data.get("cost", 1))
+    except (TypeError, ValueError):
+        return jsonify({"error": "cost must be a whole number!"})
+    if cost < 0:
+        return jsonify({"error": "cost can't be negative!"})
+    # ✅ store tuples properly; duration/transfers are optional extras
+    extra = ()
+    if data.get("duration") not in (None, "") or data.get("transfers") not in (None, ""):
+        try:
+            extra = (float(data.get("duration") or cost), int(data.get("transfers") or 0))
+        except (TypeError, ValueError):
+            return jsonify({"error": "duration and transfers must be numbers!"})
+        if extra[0] < 0 or extra[1] < 0:
+            return jsonify({"error": "duration and transfers can't be negative!"})
+    with graph_lock:
+        if city1 not in graph:
+            graph[city1] = []
+        if city2 not in graph:
+            graph[city2] = []
+        graph[city1].append((city2, cost) + extra)
+        graph[city2].append((city1, cost) + extra)
+        change = graph_changed("add_route", city1=city1, city2=city2, cost=cost, extra=list(extra))
+        save_graph_to_file()
+    return jsonify({"message": f"✅ Route added between {city1} and {city2} (Cost: {cost})",
+                    "version": change["version"]})
 
 
 @app.route("/delete_route", methods=["POST"])
@@ -245,18 +623,22 @@ def delete_route():
     data = request.get_json()
     city1 = data.get("city1", "").title()
     city2 = data.get("city2", "").title()
-    if city1 not in graph or city2 not in graph:
-        return jsonify({"error": "One or both cities not found!"})
-    # ✅ handle tuple format
-    graph[city1] = [n for n in graph[city1] if not (isinstance(n, (list, tuple)) and n[0] == city2) and n != city2]
-    graph[city2] = [n for n in graph[city2] if not (isinstance(n, (list, tuple)) and n[0] == city1) and n != city1]
-    save_graph_to_file()
-    return jsonify({"message": f"🗑️ Route between {city1} and {city2} deleted!"})
+    with graph_lock:
+        if city1 not in graph or city2 not in graph:
+            return jsonify({"error": "One or both cities not found!"})
+        # ✅ handle tuple format
+        graph[city1] = [n for n in graph[city1] if not (isinstance(n, (list, tuple)) and n[0] == city2) and n != city2]
+        graph[city2] = [n for n in graph[city2] if not (isinstance(n, (list, tuple)) and n[0] == city1) and n != city1]
+        change = graph_changed("delete_route", city1=city1, city2=city2)
+        save_graph_to_file()
+    return jsonify({"message": f"🗑️ Route between {city1} and {city2} deleted!",
+                    "version": change["version"]})
 
 
 @app.route("/save_graph", methods=["POST"])
 def save_graph():
-    save_graph_to_file()
+    with graph_lock:
+        save_graph_to_file()
     return jsonify({"message": "💾 Graph saved successfully!"})
 
 
@@ -266,19 +648,68 @@ def load_graph():
     loaded = load_graph_from_file()
     if not loaded:
         return jsonify({"error": "No saved graph found!"})
-    graph = loaded
-    return jsonify({"message": "📂 Graph loaded successfully!", "graph": graph})
+    with graph_lock:
+        # only a load that actually changes the network bumps the version
+        if loaded != json.loads(json.dumps(graph)):
+            graph = loaded
+            graph_changed("reset")
+        return versioned_response({"message": "📂 Graph loaded successfully!", "graph": graph,
+                                   "version": change_log.version, "epoch": change_log.epoch})
+
+
+@app.route("/graph", methods=["GET"])
+def get_graph():
+    with graph_lock:
+        return versioned_response({"graph": graph, "version": change_log.version,
+                                   "epoch": change_log.epoch})
+
+
+@app.route("/graph/changes", methods=["GET"])
+def graph_changes():
+    since = request.args.get("since", type=int)
+    if since is None:
+        return jsonify({"error": "since=<version> is required!"})
+    changes = change_log.changes_since(since, request.args.get("epoch"))
+    if changes is None:
+        return jsonify({"reset": True, "version": change_log.version, "epoch": change_log.epoch})
+    return versioned_response({"changes": changes, "version": change_log.version,
+                               "epoch": change_log.epoch})
 
 
 @app.route("/best_route", methods=["POST"])
 def best_route():
+    try:
+        query = best_route_query(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)})
+    return jsonify(best_route_payload(query, run_best_route(query)))
+
+
+@app.route("/pareto_routes", methods=["POST"])
+def pareto_routes_view():
     data = request.get_json()
     start, goal = data.get("start", "").title(), data.get("goal", "").title()
-    cost, path = best_route_by_cost(start, goal)
-    if path:
-        route_history.add_route(start, goal, path, cost)
-        return jsonify({"path": path, "cost": cost})
-    return jsonify({"error": "No best route found"})
+    weights = data.get("weights") or None
+    if weights is not None:
+        try:
+            weights = {name: float(weights.get(name, 0)) for name in ATTRIBUTES}
+        except (AttributeError, TypeError, ValueError):
+            return jsonify({"error": "weights must map fare, duration and transfers to numbers!"})
+    try:
+        limit = int(data["limit"]) if data.get("limit") not in (None, "") else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "limit must be a whole number!"})
+    if limit is not None and limit < 1:
+        return jsonify({"error": "limit must be at least 1!"})
+    record_query(start, goal)
+    try:
+        routes = pareto_routes(get_attribute_store(), start, goal, weights, limit,
+                               time.monotonic() + COMPUTE_BUDGET)
+    except SearchTimeout:
+        return jsonify({"error": "Search exceeded its compute budget."})
+    if routes:
+        return jsonify({"routes": routes})
+    return jsonify({"error": "No routes found"})
 
 
 @app.route("/recommend", methods=["POST"])
@@ -287,12 +718,67 @@ def recommend():
     city = data.get("city", "").title()
     if city not in graph:
         return jsonify({"error": f"{city} not found in the travel network!"})
-    rec = [n[0] if isinstance(n, (list, tuple)) else n for n in graph.get(city, [])]
+    if data.get("mode") == "geo":
+        # blend map distance with hop count through the network
+        try:
+            max_hops = int(data.get("max_hops", 2))
+            max_results = int(data.get("max_results", 5))
+            geo_weight = float(data.get("geo_weight", 0.5))
+        except (TypeError, ValueError):
+            return jsonify({"error": "max_hops, max_results and geo_weight must be numbers!"})
+        if max_hops < 1 or max_results < 1 or not 0 <= geo_weight <= 1:
+            return jsonify({"error": "max_hops and max_results must be at least 1, geo_weight between 0 and 1!"})
+        rec = blend_recommendations(locations, city, hop_distances(graph, city, max_hops), max_hops,
+                                    max_results, geo_weight)
+    else:
+        rec = [n[0] if isinstance(n, (list, tuple)) else n for n in graph.get(city, [])]
     if not rec:
         return jsonify({"error": f"No direct routes found from {city}."})
     return jsonify({"recommendations": rec})
 
 
+@app.route("/set_location", methods=["POST"])
+def set_location():
+    data = request.get_json()
+    city = data.get("city", "").title()
+    if city not in graph:
+        return jsonify({"error": f"{city} not found in the travel network!"})
+    try:
+        locations.set_location(city, float(data.get("lat")), float(data.get("lon")))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e) if isinstance(e, ValueError) else "lat and lon are required!"})
+    save_locations_to_file()
+    return jsonify({"message": f"📍 Location of {city} saved!"})
+
+
+@app.route("/nearby", methods=["POST"])
+def nearby():
+    # around a city or a raw lat/lon; radius_km for a radius search, else k nearest
+    data = request.get_json()
+    city = data.get("city", "").title()
+    if city:
+        if city not in locations:
+            return jsonify({"error": f"No location known for {city}!"})
+        lat, lon = locations.location(city)
+    else:
+        try:
+            lat, lon = float(data.get("lat")), float(data.get("lon"))
+        except (TypeError, ValueError):
+            return jsonify({"error": "Enter a city or both lat and lon!"})
+    try:
+        radius_km = float(data["radius_km"]) if data.get("radius_km") not in (None, "") else None
+        k = int(data.get("k", 5))
+    except (TypeError, ValueError):
+        return jsonify({"error": "radius_km and k must be numbers!"})
+    if (radius_km is not None and radius_km < 0) or k < 1:
+        return jsonify({"error": "radius_km can't be negative and k must be at least 1!"})
+    if radius_km is not None:
+        found = [(c, km) for c, km in locations.within(lat, lon, radius_km) if c != city]
+    else:
+        found = locations.nearest(lat, lon, k, exclude={city})
+    return jsonify({"nearby": [{"city": c, "km": round(km, 1)} for c, km in found]})
+
+
 @app.route("/most_connected")
 def most_connected():
     if not graph:
@@ -343,12 +829,25 @@ def search_city():
 
 @app.route("/recent")
 def recent():
-    return jsonify({"recent": recent_searches})
+    return jsonify({"recent": list(recent_searches)})
 
 
 @app.route("/visited")
 def visited():
-    return jsonify({"visited": list(visited_queue.queue)})
+    return jsonify({"visited": list(visited_queue)})
+
+
+@app.route("/popular")
+def popular():
+    try:
+        k = int(request.args.get("k", 10))
+    except ValueError:
+        k = 0
+    if k < 1:
+        return jsonify({"error": "k must be a whole number of at least 1!"})
+    pairs = [{"start": start, "goal": goal, "count": count}
+             for (start, goal), count in analytics.top(k)]
+    return jsonify({"popular": pairs})
 
 
 @app.route("/history")
@@ -0,0 +1,173 @@
+# async_server.py
+# ASGI serving mode:  uvicorn async_server:asgi_app
+# /best_route and /shortest_path are answered here on the event loop; every
+# other route is handed to the Flask app unchanged.
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app as traverse
+from routing_module import SearchTimeout
+
+MAX_QUEUE_DEPTH = int(os.environ.get("TRAVERSE_MAX_QUEUE_DEPTH", "64"))
+
+search_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 4)
+wsgi_executor = ThreadPoolExecutor(max_workers=8)
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one computation."""
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.calls = {}  # key -> future of the running search
+
+    def depth(self):
+        return len(self.calls)
+
+    def joinable(self, key):
+        return key in self.calls
+
+    def run(self, key, fn, *args):
+        future = self.calls.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+            self.calls[key] = future
+
+            def forget(done):
+                if self.calls.get(key) is done:
+                    del self.calls[key]
+
+            future.add_done_callback(forget)
+        # shielded so one waiter giving up doesn't cancel it for the others
+        return asyncio.shield(future)
+
+
+flights = SingleFlight(search_executor)
+
+# path -> (parse, search, respond) from app.py
+SEARCHES = {
+    "/best_route": (traverse.best_route_query, traverse.run_best_route, traverse.best_route_payload),
+    "/shortest_path": (traverse.shortest_path_query, traverse.run_shortest_path, traverse.shortest_path_payload),
+}
+
+
+async def handle_search(path, body):
+    parse, search, respond = SEARCHES[path]
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        return 200, {"error": "Request body must be JSON!"}, []
+    if not isinstance(data, dict):
+        return 200, {"error": "Request body must be a JSON object!"}, []
+    try:
+        query = parse(data)
+    except ValueError as e:
+        return 200, {"error": str(e)}, []
+    key = (path, query)
+    # shed new work when too many distinct searches are already queued;
+    # joining one that is in flight costs nothing, so that is always allowed
+    if not flights.joinable(key) and flights.depth() >= MAX_QUEUE_DEPTH:
+        return 503, {"error": "Server is busy, please retry shortly."}, [(b"retry-after", b"1")]
+    budget = traverse.COMPUTE_BUDGET
+    if data.get("budget") not in (None, ""):
+        try:
+            budget = min(budget, float(data["budget"]))
+        except (TypeError, ValueError):
+            return 200, {"error": "budget must be a number of seconds!"}, []
+    # the search itself stops at the deadline of the request that started it;
+    # later joiners may give up sooner if their own budget is smaller
+    deadline = time.monotonic() + budget
+    try:
+        result = await asyncio.wait_for(flights.run(key, search, query, deadline), budget)
+    except (asyncio.TimeoutError, SearchTimeout):
+        return 504, {"error": "Search exceeded its compute budget."}, []
+    return 200, respond(query, result), []
+
+
+def call_wsgi(scope, body):
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": (scope.get("server") or ("localhost", 80))[0],
+        "SERVER_PORT": str((scope.get("server") or ("localhost", 80))[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name, value = name.decode("latin-1").upper().replace("-", "_"), value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name != "CONTENT_LENGTH":
+            key = "HTTP_" + name
+            environ[key] = environ[key] + "," + value if key in environ else value
+
+    started = {}
+    chunks = []
+
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split()[0])
+        started["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+        return chunks.append
+
+    result = traverse.app(environ, start_response)
+    try:
+        chunks.extend(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return started["status"], started["headers"], b"".join(chunks)
+
+
+async def asgi_app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                traverse.reset_partitions()
+                search_executor.shutdown(wait=False)
+                wsgi_executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+
+    if scope["method"] == "POST" and scope["path"] in SEARCHES:
+        status, payload, headers = await handle_search(scope["path"], body)
+        content = traverse.encode_json(payload)
+        headers = headers + [(b"content-type", b"application/json"),
+                             (b"content-length", str(len(content)).encode())]
+    else:
+        loop = asyncio.get_running_loop()
+        status, headers, content = await loop.run_in_executor(wsgi_executor, call_wsgi, scope, body)
+
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": content})
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(asgi_app, host="127.0.0.1", port=int(os.environ.get("PORT", "8000")))
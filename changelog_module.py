@@ -0,0 +1,46 @@
+# changelog_module.py
+import threading
+import uuid
+from collections import deque
+
+
+class GraphChangeLog:
+    """
+    Versioned log of edits to the travel network. Clients remember the version
+    they last saw and ask for the changes after it instead of the whole graph.
+    """
+
+    def __init__(self, max_entries=1000):
+        self.version = 0
+        self.epoch = uuid.uuid4().hex[:8]  # tells server restarts apart
+        self.reset_version = 0  # anything older than this needs a full reload
+        self.entries = deque(maxlen=max_entries)
+        self.lock = threading.Lock()
+
+    def record(self, op, **details):
+        with self.lock:
+            self.version += 1
+            entry = dict(details, op=op, version=self.version)
+            self.entries.append(entry)
+            return entry
+
+    def reset(self):
+        # the whole graph was replaced, so no delta can bridge the gap
+        with self.lock:
+            self.version += 1
+            self.reset_version = self.version
+            self.entries.clear()
+
+    def changes_since(self, version, epoch=None):
+        """Changes made after `version`, or None if the client must refetch everything."""
+        with self.lock:
+            if epoch not in (None, self.epoch):
+                return None
+            if version > self.version or version < self.reset_version:
+                return None
+            if self.entries and self.entries[0]["version"] > version + 1:
+                return None  # trimmed out of the log
+            return [e for e in self.entries if e["version"] > version]
+
+    def etag(self):
+        return f"{self.epoch}-{self.version}"
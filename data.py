@@ -2,6 +2,20 @@
 from graph_module import Graph
 from tree_module import TreeNode
 
+CITY_COORDINATES = {
+    "Mumbai": (19.0760, 72.8777),
+    "Delhi": (28.6139, 77.2090),
+    "Agra": (27.1767, 78.0081),
+    "Jaipur": (26.9124, 75.7873),
+    "Hyderabad": (17.3850, 78.4867),
+    "Bangalore": (12.9716, 77.5946),
+    "Chennai": (13.0827, 80.2707),
+    "Goa": (15.2993, 74.1240),
+    "Tokyo": (35.6762, 139.6503),
+    "Osaka": (34.6937, 135.5023),
+    "Kyoto": (35.0116, 135.7681),
+}
+
 def create_graph():
     g = Graph()
 
@@ -32,6 +46,10 @@ def create_graph():
     g.add_recommendation("Tokyo", "Kyoto")
     g.add_recommendation("Mumbai", "Goa")
 
+    # Coordinates (lat, lon) for map-based "nearby" lookups
+    for city, (lat, lon) in CITY_COORDINATES.items():
+        g.set_location(city, lat, lon)
+
     return g
 
 def create_tree():
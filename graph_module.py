@@ -1,10 +1,13 @@
 # graph_module.py
 from collections import deque
+from spatial_module import SpatialIndex, blend_recommendations
+from routing_module import hop_distances
 
 class Graph:
     def __init__(self):
         self.graph = {}
         self.recommendations = {}  # explicit recommendations (hashmap)
+        self.locations = SpatialIndex()  # optional lat/lon per city
 
     def add_city(self, city):
         if city not in self.graph:
@@ -62,17 +65,33 @@ class Graph:
                     return res
         return None
 
+    def set_location(self, city, lat, lon):
+        self.add_city(city)
+        self.locations.set_location(city, lat, lon)
+
+    def nearby(self, city, k=5):
+        # k closest cities on the map as [(city, km)]
+        loc = self.locations.location(city)
+        if loc is None:
+            return []
+        return self.locations.nearest(loc[0], loc[1], k, exclude={city})
+
     def add_recommendation(self, city, suggestion):
         if city not in self.recommendations:
             self.recommendations[city] = []
         if suggestion not in self.recommendations[city]:
             self.recommendations[city].append(suggestion)
 
-    def get_recommendation(self, city, max_hops=2, max_results=5):
+    def get_recommendation(self, city, max_hops=2, max_results=5, mode="hops", geo_weight=0.5):
         """
         Return explicit recommendations if available; otherwise return nearby cities
         within max_hops using BFS (excluding the city itself).
+        With mode="geo", rank cities by a blend of map distance and hop count instead.
         """
+        if mode == "geo":
+            return blend_recommendations(self.locations, city, hop_distances(self.graph, city, max_hops),
+                                         max_hops, max_results, geo_weight)
+
         if city in self.recommendations and self.recommendations[city]:
             return list(dict.fromkeys(self.recommendations[city]))  # preserve order, unique
 
@@ -0,0 +1,134 @@
+# pareto_module.py
+import heapq
+
+import numpy as np
+
+from routing_module import check_deadline
+
+ATTRIBUTES = ("fare", "duration", "transfers")
+
+
+class EdgeAttributes:
+    """
+    Attribute vectors of every edge, stored column-wise (one NumPy array per
+    attribute) with edges grouped by source city so a city's outgoing edges
+    are one contiguous slice.
+    """
+
+    def __init__(self, edges):
+        # edges: iterable of (city, neighbor, {attribute: value})
+        edges = list(edges)
+        self.cities = list(dict.fromkeys(c for city, neighbor, _ in edges for c in (city, neighbor)))
+        self.index = {city: i for i, city in enumerate(self.cities)}
+        edges.sort(key=lambda e: self.index[e[0]])
+
+        sources = np.array([self.index[e[0]] for e in edges], dtype=np.int64)
+        self.targets = np.array([self.index[e[1]] for e in edges], dtype=np.int64)
+        self.columns = {name: np.array([e[2][name] for e in edges], dtype=np.float64)
+                        for name in ATTRIBUTES}
+        self.offsets = np.zeros(len(self.cities) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(self.cities)), out=self.offsets[1:])
+        # edge-major copy so one city's edges can be added to a label in one step;
+        # every leg also counts one boarding, so a route's transfers come out as
+        # boardings - 1 (see pareto_routes)
+        self.vectors = np.column_stack([self.columns[name] for name in ATTRIBUTES]) \
+            if edges else np.zeros((0, len(ATTRIBUTES)))
+        self.vectors[:, ATTRIBUTES.index("transfers")] += 1
+
+    def out_edges(self, i):
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        return self.targets[lo:hi], self.vectors[lo:hi]
+
+
+def _dominated(front, vectors):
+    # row i of `vectors` is dominated if some row of `front` is <= it everywhere
+    if len(front) == 0:
+        return np.zeros(len(vectors), dtype=bool)
+    return (front[None, :, :] <= vectors[:, None, :]).all(axis=2).any(axis=1)
+
+
+def pareto_routes(store, start, goal, weights=None, limit=None, deadline=None):
+    """
+    Every route from start to goal that no other route beats on fare,
+    duration and transfers at once (multi-criteria label-setting search).
+
+    With `weights` ({attribute: weight}) the front is ranked by weighted sum,
+    otherwise by fare. Returns a list of {"path", <attributes>, ["score"]}.
+    Raises SearchTimeout once `deadline` passes. Negative attributes would
+    let routes improve forever around a cycle, so they give [].
+    """
+    if start not in store.index or goal not in store.index or start == goal:
+        return []
+    if (store.vectors < 0).any():
+        return []
+    src, dst = store.index[start], store.index[goal]
+
+    vectors = [np.zeros(len(ATTRIBUTES))]  # label id -> cost vector
+    parents = [None]
+    cities = [src]
+    alive = [True]
+    fronts = {src: (vectors[0][None, :], [0])}  # city -> (label vectors, label ids)
+    empty = np.zeros((0, len(ATTRIBUTES)))
+    heap = [(0.0, 0)]
+
+    while heap:
+        check_deadline(deadline)
+        _, label = heapq.heappop(heap)
+        if not alive[label]:
+            continue
+        city = cities[label]
+        if city == dst:
+            continue
+        targets, edge_vectors = store.out_edges(city)
+        if len(targets) == 0:
+            continue
+        candidates = vectors[label] + edge_vectors
+        # anything the destination front already beats can never be useful
+        keep = ~_dominated(fronts.get(dst, (empty, []))[0], candidates)
+        for neighbor, vector in zip(targets[keep], candidates[keep]):
+            neighbor = int(neighbor)
+            front, ids = fronts.get(neighbor, (empty, []))
+            if _dominated(front, vector[None, :])[0]:
+                continue
+            beaten = (vector[None, :] <= front).all(axis=1)
+            for i in np.flatnonzero(beaten):
+                alive[ids[i]] = False
+            new_id = len(vectors)
+            vectors.append(vector)
+            parents.append(label)
+            cities.append(neighbor)
+            alive.append(True)
+            fronts[neighbor] = (np.vstack([front[~beaten], vector]),
+                                [i for i, b in zip(ids, beaten) if not b] + [new_id])
+            heapq.heappush(heap, (float(vector.sum()), new_id))
+
+    front, ids = fronts.get(dst, (empty, []))
+    if not ids:
+        return []
+    # the first boarding isn't a transfer; same shift for every route, so the
+    # front is unchanged
+    front = front.copy()
+    front[:, ATTRIBUTES.index("transfers")] -= 1
+    if weights:
+        w = np.array([float(weights.get(name, 0)) for name in ATTRIBUTES])
+        scores = front @ w
+    else:
+        scores = front[:, 0]
+    order = np.argsort(scores, kind="stable")
+    if limit:
+        order = order[:limit]
+
+    routes = []
+    for i in order:
+        path = []
+        label = ids[i]
+        while label is not None:
+            path.append(store.cities[cities[label]])
+            label = parents[label]
+        route = {"path": path[::-1]}
+        for name, value in zip(ATTRIBUTES, front[i]):
+            route[name] = int(value) if float(value).is_integer() else float(value)
+        if weights:
+            route["score"] = float(scores[i])
+        routes.append(route)
+    return routes
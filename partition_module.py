@@ -0,0 +1,365 @@
+# partition_module.py
+import heapq
+import multiprocessing as mp
+import threading
+from array import array
+from collections import deque
+from multiprocessing import shared_memory
+
+from routing_module import check_deadline
+
+INF = float("inf")
+
+
+class PartitionRetired(Exception):
+    """A query reached region workers that have already been shut down."""
+
+
+def partition_nodes(cities, neighbours, parts):
+    """
+    Split the cities into `parts` balanced regions. Cities are laid out in BFS
+    order so that neighbouring cities land next to each other, then the order
+    is cut into slices whose sizes differ by at most one. Returns {city: region}.
+    """
+    order = []
+    seen = set()
+    for root in cities:
+        if root in seen:
+            continue
+        seen.add(root)
+        queue = deque([root])
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for neigh in neighbours.get(node, ()):
+                if neigh not in seen:
+                    seen.add(neigh)
+                    queue.append(neigh)
+    parts = max(1, min(parts, len(order)))
+    return {city: i * parts // len(order) for i, city in enumerate(order)}
+
+
+# -----------------------------
+# Shared-memory adjacency (CSR)
+# -----------------------------
+# One block per region, laid out as:
+#   fwd weights (m doubles) | rev weights (m doubles) |
+#   fwd offsets (n+1 ints)  | rev offsets (n+1 ints)  |
+#   fwd targets (m ints)    | rev targets (m ints)
+
+def _sections(n, m):
+    sizes = [("fwd_w", "d", m), ("rev_w", "d", m),
+             ("fwd_off", "i", n + 1), ("rev_off", "i", n + 1),
+             ("fwd_tgt", "i", m), ("rev_tgt", "i", m)]
+    sections = []
+    pos = 0
+    for name, code, count in sizes:
+        nbytes = count * array(code).itemsize
+        sections.append((name, code, pos, pos + nbytes))
+        pos += nbytes
+    return sections, pos
+
+
+def _csr(n, edges):
+    # edges: list of (u, v, cost) with local ids
+    buckets = [[] for _ in range(n)]
+    for u, v, cost in edges:
+        buckets[u].append((v, cost))
+    offsets, targets, weights = array("i", [0]), array("i"), array("d")
+    for out in buckets:
+        for v, cost in out:
+            targets.append(v)
+            weights.append(cost)
+        offsets.append(len(targets))
+    return offsets, targets, weights
+
+
+def _attach_views(buf, n, m):
+    sections, _ = _sections(n, m)
+    return {name: buf[start:end].cast(code) for name, code, start, end in sections}
+
+
+def _dijkstra(offsets, targets, weights, src, unit, stop=None):
+    dist = {src: 0}
+    prev = {src: None}
+    heap = [(0, src)]
+    done = set()
+    while heap:
+        d, node = heapq.heappop(heap)
+        if node in done:
+            continue
+        done.add(node)
+        if node == stop:
+            break
+        for e in range(offsets[node], offsets[node + 1]):
+            neigh = targets[e]
+            nd = d + (1 if unit else weights[e])
+            if nd < dist.get(neigh, INF):
+                dist[neigh] = nd
+                prev[neigh] = node
+                heapq.heappush(heap, (nd, neigh))
+    return dist, prev
+
+
+def _region_worker(conn, shm_name, n, m, boundary):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    views = _attach_views(shm.buf, n, m)
+    fwd = (views["fwd_off"], views["fwd_tgt"], views["fwd_w"])
+    rev = (views["rev_off"], views["rev_tgt"], views["rev_w"])
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            op = msg[0]
+            if op == "table":
+                # boundary -> boundary distances that stay inside this region
+                unit = msg[1]
+                table = {}
+                for b in boundary:
+                    dist, _ = _dijkstra(*fwd, b, unit)
+                    table[b] = [(b2, dist[b2]) for b2 in boundary if b2 != b and b2 in dist]
+                conn.send(table)
+            elif op == "dists":
+                _, src, reverse, unit, extra = msg
+                dist, _ = _dijkstra(*(rev if reverse else fwd), src, unit)
+                conn.send({t: dist[t] for t in list(boundary) + extra if t in dist})
+            elif op == "path":
+                _, src, dst, unit = msg
+                _, prev = _dijkstra(*fwd, src, unit, stop=dst)
+                if dst not in prev:
+                    conn.send(None)
+                    continue
+                path = []
+                node = dst
+                while node is not None:
+                    path.append(node)
+                    node = prev[node]
+                conn.send(path[::-1])
+    except EOFError:
+        pass
+    finally:
+        for view in views.values():
+            view.release()
+        shm.close()
+
+
+class Region:
+    def __init__(self, index, names, edges, boundary):
+        self.index = index
+        self.names = names
+        self.boundary = boundary
+        self.lock = threading.Lock()
+        self.closed = False
+
+        n, m = len(names), len(edges)
+        fwd = _csr(n, edges)
+        rev = _csr(n, [(v, u, cost) for u, v, cost in edges])
+        data = {"fwd_off": fwd[0], "fwd_tgt": fwd[1], "fwd_w": fwd[2],
+                "rev_off": rev[0], "rev_tgt": rev[1], "rev_w": rev[2]}
+        sections, size = _sections(n, m)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for name, _, start, end in sections:
+            self.shm.buf[start:end] = data[name].tobytes()
+
+        self.conn, child = mp.Pipe()
+        self.process = mp.Process(target=_region_worker,
+                                  args=(child, self.shm.name, n, m, boundary),
+                                  daemon=True)
+        self.process.start()
+        child.close()
+
+    def call(self, msg, deadline=None):
+        check_deadline(deadline)
+        with self.lock:
+            check_deadline(deadline)  # waiting for the lock may have used it up
+            if self.closed:
+                raise PartitionRetired(f"region {self.index} has been shut down")
+            try:
+                self.conn.send(msg)
+                return self.conn.recv()
+            except (EOFError, OSError) as e:
+                raise PartitionRetired(f"region {self.index} worker is gone") from e
+
+    def close(self):
+        # taking the lock waits for any call already talking to the worker
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            try:
+                self.conn.send(None)
+            except (OSError, EOFError):
+                pass
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.conn.close()
+            self.shm.close()
+            self.shm.unlink()
+
+
+class PartitionedGraph:
+    """
+    Road network split into balanced regions, each owned by a worker process
+    that searches its own shared-memory adjacency. Cross-region queries are
+    stitched here over the boundary-node tables.
+    """
+
+    def __init__(self, cities, edges, parts):
+        self.lock = threading.Lock()
+        self.active = 0  # queries currently using the workers
+        self.retired = False
+        self.closed = False
+        self.regions = []
+
+        edges = list(edges)
+        cities = list(dict.fromkeys(list(cities) + [c for u, v, _ in edges for c in (u, v)]))
+        neighbours = {}
+        for u, v, _ in edges:
+            neighbours.setdefault(u, set()).add(v)
+            neighbours.setdefault(v, set()).add(u)
+
+        self.region_of = partition_nodes(cities, neighbours, parts)
+        count = max(self.region_of.values(), default=-1) + 1
+        names = [[] for _ in range(count)]
+        self.index = {}  # city -> (region, local id)
+        for city in cities:
+            r = self.region_of[city]
+            self.index[city] = (r, len(names[r]))
+            names[r].append(city)
+
+        local_edges = [[] for _ in range(count)]
+        boundary = [set() for _ in range(count)]
+        self.cut = {}  # (region, local) -> [((region, local), cost)]
+        for u, v, cost in edges:
+            (ru, lu), (rv, lv) = self.index[u], self.index[v]
+            if ru == rv:
+                local_edges[ru].append((lu, lv, cost))
+            else:
+                self.cut.setdefault((ru, lu), []).append(((rv, lv), cost))
+                boundary[ru].add(lu)
+                boundary[rv].add(lv)
+
+        try:
+            for r in range(count):
+                self.regions.append(Region(r, names[r], local_edges[r], sorted(boundary[r])))
+            # every worker builds its boundary tables in parallel
+            self.tables = {}
+            for unit in (False, True):
+                for region in self.regions:
+                    region.conn.send(("table", unit))
+                self.tables[unit] = [region.conn.recv() for region in self.regions]
+        except Exception:
+            self.close()
+            raise
+
+    def route(self, start, goal, unit=False, deadline=None):
+        """
+        Cheapest route from start to goal (or fewest hops when `unit` is set).
+        Returns (cost, path) like best_route_by_cost, or (None, []).
+        Raises PartitionRetired once the workers have been shut down, and
+        SearchTimeout once `deadline` passes.
+        """
+        if self.closed:
+            raise PartitionRetired("partitioned graph has been shut down")
+        if start == goal:
+            return 0, [start]  # same as the in-process searches, known city or not
+        if start not in self.index or goal not in self.index:
+            return None, []
+        rs, ls = self.index[start]
+        rt, lt = self.index[goal]
+        src_dists = self.regions[rs].call(("dists", ls, False, unit, [lt] if rs == rt else []), deadline)
+        dst_dists = self.regions[rt].call(("dists", lt, True, unit, []), deadline)
+
+        # Dijkstra over the overlay: start, goal and every boundary node
+        source, target = ("start",), ("goal",)
+        dist = {source: 0}
+        prev = {source: None}
+        heap = [(0, 0, source)]
+        done = set()
+        tie = 1
+        while heap:
+            check_deadline(deadline)
+            d, _, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            if node == target:
+                break
+            if node == source:
+                out = [((rs, b), c) for b, c in src_dists.items()]
+                if rs == rt and lt in src_dists:
+                    out.append((target, src_dists[lt]))
+            else:
+                r, b = node
+                out = [((r, b2), c) for b2, c in self.tables[unit][r].get(b, [])]
+                out += [(key, 1 if unit else c) for key, c in self.cut.get(node, [])]
+                if r == rt and b in dst_dists:
+                    out.append((target, dst_dists[b]))
+            for neigh, c in out:
+                nd = d + c
+                if nd < dist.get(neigh, INF):
+                    dist[neigh] = nd
+                    prev[neigh] = node
+                    heapq.heappush(heap, (nd, tie, neigh))
+                    tie += 1
+        if target not in dist:
+            return None, []
+
+        hops = []
+        node = target
+        while node is not None:
+            hops.append(node)
+            node = prev[node]
+        hops.reverse()
+        hops[0], hops[-1] = (rs, ls), (rt, lt)
+        return _tidy(dist[target]), self._expand(hops, unit, deadline)
+
+    def _expand(self, hops, unit, deadline=None):
+        # consecutive overlay nodes in one region are joined by that region's
+        # own shortest path; nodes in different regions share a cut edge
+        path = [self.regions[hops[0][0]].names[hops[0][1]]]
+        for (ra, a), (rb, b) in zip(hops, hops[1:]):
+            region = self.regions[rb]
+            if ra != rb:
+                path.append(region.names[b])
+            elif a != b:
+                segment = region.call(("path", a, b, unit), deadline)
+                path.extend(region.names[i] for i in segment[1:])
+        return path
+
+    def acquire(self):
+        # callers pair this with release() around their route() calls
+        with self.lock:
+            if self.retired:
+                raise PartitionRetired("partitioned graph has been retired")
+            self.active += 1
+
+    def release(self):
+        with self.lock:
+            self.active -= 1
+            close_now = self.retired and self.active == 0
+        if close_now:
+            self.close()
+
+    def retire(self):
+        """Refuse new queries and shut down once the in-flight ones finish."""
+        with self.lock:
+            self.retired = True
+            close_now = self.active == 0
+        if close_now:
+            self.close()
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.retired = True
+        for region in self.regions:
+            region.close()
+
+
+def _tidy(cost):
+    return int(cost) if float(cost).is_integer() else cost
@@ -0,0 +1,120 @@
+# routing_module.py
+import heapq
+import time
+from collections import deque
+
+INF = float("inf")
+
+
+class SearchTimeout(Exception):
+    """A search ran past its deadline (a time.monotonic() value)."""
+
+
+def check_deadline(deadline):
+    if deadline is not None and time.monotonic() > deadline:
+        raise SearchTimeout("search exceeded its compute budget")
+
+
+def hop_distances(adjacency, city, max_hops):
+    """
+    {city: hops} for every city within max_hops of `city`. Neighbour lists may
+    hold plain names or (name, cost, ...) entries.
+    """
+    if city not in adjacency:
+        return {}
+    dist = {city: 0}
+    queue = deque([city])
+    while queue:
+        node = queue.popleft()
+        if dist[node] >= max_hops:
+            continue
+        for neighbor_info in adjacency.get(node, []):
+            neighbor = neighbor_info[0] if isinstance(neighbor_info, (list, tuple)) else neighbor_info
+            if neighbor not in dist:
+                dist[neighbor] = dist[node] + 1
+                queue.append(neighbor)
+    return dist
+
+
+def distances_to(adjacency, goal, avoid=(), unit=False, deadline=None):
+    """
+    Cost (or hop count when `unit` is set) of the cheapest way from every city
+    to `goal`, never passing through a city in `avoid`. Unreachable cities are
+    left out.
+    """
+    reverse = {}
+    for city, out in adjacency.items():
+        if city in avoid:
+            continue
+        for neighbor, cost in out:
+            if neighbor not in avoid:
+                reverse.setdefault(neighbor, []).append((city, cost))
+    dist = {goal: 0}
+    heap = [(0, goal)]
+    while heap:
+        check_deadline(deadline)
+        d, city = heapq.heappop(heap)
+        if d > dist[city]:
+            continue
+        for prev_city, cost in reverse.get(city, []):
+            nd = d + (1 if unit else cost)
+            if nd < dist.get(prev_city, INF):
+                dist[prev_city] = nd
+                heapq.heappush(heap, (nd, prev_city))
+    return dist
+
+
+def constrained_route(adjacency, start, goal, avoid=(), max_hops=None, max_cost=None, deadline=None):
+    """
+    Cheapest route from start to goal that skips every city in `avoid`, takes
+    at most `max_hops` legs and costs at most `max_cost`.
+
+    Label-setting search over (cost, hops) labels: a label is dropped when
+    another label at the same city is no worse on both, and partial routes
+    that can no longer meet a limit (judged by exact distances to the goal)
+    are never expanded. Returns (cost, path) or (None, []), and raises
+    SearchTimeout once `deadline` passes. Negative costs are not supported
+    (every undirected one is a negative cycle), so they give (None, []).
+    """
+    avoid = set(avoid)
+    if start in avoid or goal in avoid:
+        return None, []
+    if any(cost < 0 for out in adjacency.values() for _, cost in out):
+        return None, []
+    cost_left = distances_to(adjacency, goal, avoid, deadline=deadline)
+    hops_left = distances_to(adjacency, goal, avoid, unit=True, deadline=deadline) if max_hops is not None else {}
+    if start not in cost_left:
+        return None, []
+
+    def feasible(city, cost, hops):
+        if max_cost is not None and cost + cost_left[city] > max_cost:
+            return False
+        if max_hops is not None and hops + hops_left.get(city, INF) > max_hops:
+            return False
+        return True
+
+    if not feasible(start, 0, 0):
+        return None, []
+
+    # cost_left is an exact lower bound, so it doubles as an A* heuristic
+    heap = [(cost_left[start], 0, 0, start, (start,))]
+    labels = {}  # city -> [(cost, hops)] that were expanded
+    while heap:
+        check_deadline(deadline)
+        _, cost, hops, city, path = heapq.heappop(heap)
+        if city == goal:
+            return cost, list(path)
+        if any(c <= cost and h <= hops for c, h in labels.get(city, [])):
+            continue
+        labels.setdefault(city, []).append((cost, hops))
+        for neighbor, edge_cost in adjacency.get(city, []):
+            if neighbor in avoid or neighbor in path or neighbor not in cost_left:
+                continue
+            new_cost, new_hops = cost + edge_cost, hops + 1
+            if not feasible(neighbor, new_cost, new_hops):
+                continue
+            if any(c <= new_cost and h <= new_hops for c, h in labels.get(neighbor, [])):
+                continue
+            heapq.heappush(heap, (new_cost + cost_left[neighbor], new_cost, new_hops,
+                                  neighbor, path + (neighbor,)))
+    return None, []
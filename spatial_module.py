@@ -0,0 +1,266 @@
+# spatial_module.py
+import heapq
+import math
+import threading
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _to_xyz(lat, lon):
+    lat, lon = math.radians(lat), math.radians(lon)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def _chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def _km_to_chord(km):
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+class _Tree:
+    # immutable once built; queries keep using whichever tree they started with
+    def __init__(self, locations, leaf_size):
+        self.names = list(locations)
+        self.members = set(self.names)
+        self.points = [_to_xyz(*locations[c]) for c in self.names]
+        self.columns = list(zip(*self.points))
+        self.leaf_size = leaf_size
+        self.nodes = []
+        if self.names:
+            self._build(list(range(len(self.names))))
+
+    def _build(self, idx):
+        # node: (axis, split, left, right) or (None, indices) for a leaf
+        node_id = len(self.nodes)
+        self.nodes.append(None)
+        if len(idx) <= self.leaf_size:
+            self.nodes[node_id] = (None, idx)
+            return node_id
+        spreads = []
+        for column in self.columns:
+            values = list(map(column.__getitem__, idx))
+            spreads.append(max(values) - min(values))
+        axis = spreads.index(max(spreads))
+        column = self.columns[axis]
+        idx.sort(key=column.__getitem__)
+        mid = len(idx) // 2
+        split = column[idx[mid]]
+        left = self._build(idx[:mid])
+        right = self._build(idx[mid:])
+        self.nodes[node_id] = (axis, split, left, right)
+        return node_id
+
+
+class SpatialIndex:
+    """
+    City coordinates in a k-d tree. Points live on the unit sphere (x, y, z),
+    where straight-line distance grows with great-circle distance, so there is
+    no special case for the date line or the poles.
+
+    The tree is never edited in place. Cities placed since the last build sit
+    in a small pending table, and cities moved or removed since then are
+    tombstoned in the tree. Once those grow too long, a new tree is built on a
+    background thread and swapped in, so lookups never wait for a rebuild.
+    Safe to share between threads.
+    """
+
+    def __init__(self, leaf_size=16, max_pending=256):
+        self.leaf_size = leaf_size
+        self.max_pending = max_pending
+        self.locations = {}  # city -> (lat, lon)
+        self.version = 0
+        self._lock = threading.Lock()
+        self._tree = _Tree({}, leaf_size)
+        self._pending = {}  # city -> xyz, not in the tree
+        self._tombstones = set()  # cities whose tree entry is out of date
+        self._building = False
+        self._build_lock = threading.Lock()  # one build at a time
+        self._changed = set()  # cities touched while a build is running
+
+    def __len__(self):
+        return len(self.locations)
+
+    def __contains__(self, city):
+        return city in self.locations
+
+    def set_location(self, city, lat, lon):
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError("Latitude must be within ±90 and longitude within ±180")
+        with self._lock:
+            self.locations[city] = (lat, lon)
+            self._pending[city] = _to_xyz(lat, lon)
+            self._touched(city)
+
+    def remove(self, city):
+        with self._lock:
+            if self.locations.pop(city, None) is None:
+                return
+            self._pending.pop(city, None)
+            self._touched(city)
+
+    def _touched(self, city):
+        # caller holds the lock
+        if city in self._tree.members:
+            self._tombstones.add(city)
+        if self._building:
+            self._changed.add(city)
+        self.version += 1
+        self._schedule_rebuild()
+
+    def _schedule_rebuild(self):
+        # caller holds the lock
+        if not self._building and len(self._pending) + len(self._tombstones) > self.max_pending:
+            self._building = True
+            threading.Thread(target=self.rebuild, daemon=True).start()
+
+    def rebuild(self):
+        """Build a fresh tree and swap it in (also handy right after a bulk load)."""
+        with self._build_lock:
+            with self._lock:
+                snapshot = dict(self.locations)
+                self._building = True
+                self._changed = set()
+            try:
+                tree = _Tree(snapshot, self.leaf_size)
+            except Exception:
+                with self._lock:
+                    self._building = False
+                raise
+            with self._lock:
+                # anything edited while building stays pending / tombstoned
+                self._pending = {c: _to_xyz(*self.locations[c]) for c in self._changed if c in self.locations}
+                self._tombstones = {c for c in self._changed if c in tree.members}
+                self._tree = tree
+                self._changed = set()
+                self._building = False
+                self._schedule_rebuild()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.locations)
+
+    def location(self, city):
+        return self.locations.get(city)
+
+    def distance_km(self, city1, city2):
+        a, b = self.locations.get(city1), self.locations.get(city2)
+        if a is None or b is None:
+            return None
+        return haversine_km(a[0], a[1], b[0], b[1])
+
+    def _view(self):
+        with self._lock:
+            return self._tree, list(self._pending.items()), frozenset(self._tombstones)
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def within(self, lat, lon, radius_km):
+        """Cities within radius_km of (lat, lon) as [(city, km)], nearest first."""
+        tree, pending, tombstones = self._view()
+        q = _to_xyz(lat, lon)
+        r = _km_to_chord(radius_km)
+        r2 = r * r
+        found = []
+        if tree.nodes:
+            points, names = tree.points, tree.names
+            stack = [0]
+            while stack:
+                node = tree.nodes[stack.pop()]
+                if node[0] is None:
+                    for i in node[1]:
+                        p = points[i]
+                        d2 = (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2
+                        if d2 <= r2 and names[i] not in tombstones:
+                            found.append((d2, names[i]))
+                    continue
+                axis, split, left, right = node
+                diff = q[axis] - split
+                if diff <= r:
+                    stack.append(left)
+                if diff >= -r:
+                    stack.append(right)
+        for city, p in pending:
+            d2 = (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2
+            if d2 <= r2:
+                found.append((d2, city))
+        found.sort()
+        return [(city, _chord_to_km(math.sqrt(d2))) for d2, city in found]
+
+    def nearest(self, lat, lon, k=5, exclude=()):
+        """The k cities closest to (lat, lon) as [(city, km)], nearest first."""
+        if k <= 0:
+            return []
+        tree, pending, tombstones = self._view()
+        q = _to_xyz(lat, lon)
+        best = []  # max-heap of (-d2, city)
+
+        def offer(d2, city):
+            if city in exclude:
+                return
+            if len(best) < k:
+                heapq.heappush(best, (-d2, city))
+            elif d2 < -best[0][0]:
+                heapq.heapreplace(best, (-d2, city))
+
+        for city, p in pending:
+            offer((p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2, city)
+        if tree.nodes:
+            points, names = tree.points, tree.names
+            stack = [(0, 0.0)]
+            while stack:
+                node_id, bound = stack.pop()
+                if len(best) == k and bound > -best[0][0]:
+                    continue
+                node = tree.nodes[node_id]
+                if node[0] is None:
+                    for i in node[1]:
+                        if names[i] not in tombstones:
+                            p = points[i]
+                            offer((p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2,
+                                  names[i])
+                    continue
+                axis, split, left, right = node
+                diff = q[axis] - split
+                near, far = (left, right) if diff < 0 else (right, left)
+                stack.append((far, diff * diff))
+                stack.append((near, 0.0))
+        return [(city, _chord_to_km(math.sqrt(d2))) for d2, city in sorted((-d, c) for d, c in best)]
+
+
+def blend_recommendations(index, city, hop_distances, max_hops, max_results=5, geo_weight=0.5):
+    """
+    Rank cities by a mix of geographic distance and hop count from `city`.
+    `hop_distances` maps reachable cities to hops (within max_hops). Cities
+    only reachable on the map, or only through the network, still take part;
+    the missing measure counts as the worst possible.
+    """
+    candidates = {c: h for c, h in hop_distances.items() if c != city and 0 < h <= max_hops}
+    origin = index.location(city)
+    km = {}
+    if origin is not None:
+        for near, dist in index.nearest(origin[0], origin[1], k=max_results * 3, exclude={city}):
+            km[near] = dist
+        for c in candidates:
+            if c not in km and c in index:
+                km[c] = index.distance_km(city, c)
+    names = set(candidates) | set(km)
+    if not names:
+        return []
+    worst_km = max(km.values(), default=0) or 1
+
+    def score(c):
+        geo = km.get(c, worst_km) / worst_km
+        hops = candidates.get(c, max_hops + 1) / (max_hops + 1)
+        return geo_weight * geo + (1 - geo_weight) * hops
+
+    return sorted(names, key=lambda c: (score(c), c))[:max_results]